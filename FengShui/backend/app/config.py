@@ -17,7 +17,16 @@ USE_AI_ENHANCEMENT = os.getenv("USE_AI_ENHANCEMENT", "false").lower() == "true"
 AI_API_KEY: Optional[str] = os.getenv("AI_API_KEY")
 AI_MODEL = os.getenv("AI_MODEL", "gemini-2.5-flash")  # Default to Gemini 2.5 Flash (fast & affordable)
 AI_TIMEOUT = int(os.getenv("AI_TIMEOUT", "5"))
+AI_RESULT_TTL = int(os.getenv("AI_RESULT_TTL", "300"))  # Seconds to keep background AI results for polling
+AI_RESULT_MAX_ENTRIES = int(os.getenv("AI_RESULT_MAX_ENTRIES", "1000"))
 
 # Application Configuration
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "512"))  # Cached analyses of repeated requests (0 = off)
+
+# CORS Configuration (comma-separated list of allowed origins, "*" = any)
+CORS_ALLOW_ORIGINS = [
+    origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if origin.strip()
+]
+CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", "86400"))  # Let browsers cache preflights for 24h
@@ -0,0 +1,153 @@
+"""
+Single-pass decoding of /analyze-room bodies straight from the raw JSON bytes
+Uses msgspec mirrors of the request models when available, pydantic's
+model_validate_json otherwise (and for any body msgspec rejects)
+"""
+from typing import List, Literal, Optional
+
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.models import (
+    TOO_LARGE_DIMENSION,
+    AnalyzeRoomRequest,
+    Dimensions,
+    Object,
+    Position,
+    RoomDimensions,
+    RoomMetadata,
+)
+
+# msgspec is optional - decode falls back to pydantic's JSON validation without it
+try:
+    import msgspec
+    from msgspec import Meta
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+
+if MSGSPEC_AVAILABLE:
+    from typing import Annotated
+
+    # Same constraints as the pydantic models in app.models
+    Length = Annotated[float, Meta(gt=0, le=TOO_LARGE_DIMENSION)]
+
+    class PositionMsg(msgspec.Struct):
+        x: float
+        y: float
+
+    class DimensionsMsg(msgspec.Struct):
+        length_m: Length
+        width_m: Length
+        height_m: Length
+
+    class RoomMetadataMsg(msgspec.Struct):
+        room_type: Optional[Literal[
+            "bedroom", "living room", "office", "kitchen", "dining room", "bathroom", "meditation room"
+        ]] = None
+        north_direction_deg: Optional[Annotated[float, Meta(ge=0, le=360)]] = None
+        room_style: Optional[Literal[
+            "modern", "minimalist", "traditional", "bohemian", "zen",
+            "industrial", "contemporary", "rustic", "luxury"
+        ]] = None
+        feng_shui_intention: Optional[Literal[
+            "wealth", "fame", "love", "health", "creativity", "knowledge", "career", "family", "balance"
+        ]] = None
+        birth_year: Optional[Annotated[int, Meta(ge=1900, le=2027)]] = None
+
+    class ObjectMsg(msgspec.Struct):
+        id: str
+        type: str
+        position: PositionMsg
+        rotation_deg: Annotated[float, Meta(ge=0, le=360)]
+        dimensions: DimensionsMsg
+
+    class AnalyzeRoomRequestMsg(msgspec.Struct):
+        room_metadata: RoomMetadataMsg
+        room_dimensions: DimensionsMsg
+        objects: List[ObjectMsg]
+
+    # strict=False accepts the same lax inputs pydantic does (e.g. "1.5" for a float);
+    # unknown fields such as model_file_url are ignored, as with the pydantic models
+    _request_decoder = msgspec.json.Decoder(AnalyzeRoomRequestMsg, strict=False)
+
+def _inline_refs(schema, defs):
+    """Replace "#/$defs/..." references with the definitions themselves"""
+    if isinstance(schema, dict):
+        ref = schema.get("$ref")
+        if ref is not None:
+            return _inline_refs(defs[ref.rsplit("/", 1)[-1]], defs)
+        return {key: _inline_refs(value, defs) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [_inline_refs(value, defs) for value in schema]
+    return schema
+
+
+def request_body_schema() -> dict:
+    """Self-contained JSON schema of AnalyzeRoomRequest for documenting a raw-body route"""
+    schema = AnalyzeRoomRequest.model_json_schema()
+    defs = schema.pop("$defs", {})
+    return _inline_refs(schema, defs)
+
+
+def _dimensions(msg, model=Dimensions):
+    return model.model_construct(length_m=msg.length_m, width_m=msg.width_m, height_m=msg.height_m)
+
+
+def _decode_with_pydantic(body: bytes) -> AnalyzeRoomRequest:
+    # Parses and validates in one pass (no json.loads dict in between)
+    try:
+        return AnalyzeRoomRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([
+            {"type": error["type"], "loc": ("body",) + error["loc"], "msg": error["msg"]}
+            for error in e.errors(include_url=False, include_input=False, include_context=False)
+        ])
+
+
+def _decode_with_msgspec(body: bytes) -> AnalyzeRoomRequest:
+    try:
+        msg = _request_decoder.decode(body)
+    except (msgspec.ValidationError, msgspec.DecodeError):
+        # Errors are the rare path: let pydantic decide, so invalid bodies get its full
+        # error list (types, locs) and anything it would accept still goes through
+        return _decode_with_pydantic(body)
+
+    meta = msg.room_metadata
+    return AnalyzeRoomRequest.model_construct(
+        room_metadata=RoomMetadata.model_construct(
+            room_type=meta.room_type,
+            north_direction_deg=meta.north_direction_deg,
+            room_style=meta.room_style,
+            feng_shui_intention=meta.feng_shui_intention,
+            birth_year=meta.birth_year
+        ),
+        room_dimensions=_dimensions(msg.room_dimensions, RoomDimensions),
+        objects=[
+            Object.model_construct(
+                id=obj.id,
+                type=obj.type,
+                position=Position.model_construct(x=obj.position.x, y=obj.position.y),
+                rotation_deg=obj.rotation_deg,
+                dimensions=_dimensions(obj.dimensions)
+            )
+            for obj in msg.objects
+        ]
+    )
+
+
+"""
+    Decode and validate an /analyze-room body.
+
+    With msgspec the result is built with model_construct, so the analyzer reads
+    the same pydantic models without pydantic re-validating them.
+
+    Raises:
+        RequestValidationError: Invalid JSON or invalid fields, in the same
+            type/loc/msg shape FastAPI's own body validation reports
+"""
+def decode_analyze_request(body: bytes) -> AnalyzeRoomRequest:
+    if MSGSPEC_AVAILABLE:
+        return _decode_with_msgspec(body)
+    return _decode_with_pydantic(body)
@@ -2,17 +2,104 @@
 Feng Shui rule-based analysis logic
 Implements priority rules: bed facing door, desk position, clutter, light, paths
 """
+import heapq
 import math
-from typing import List, Dict, Tuple
+import sys
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Numba is optional - geometry kernels fall back to plain NumPy without it.
+# Kernels release the GIL (nogil) so analyses running in worker threads overlap
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 from app.models import AnalyzeRoomRequest, Object, Position, Suggestion, BaguaAnalysis
 
 
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """Lock a module-level table array so requests can't mutate it by accident"""
+    array.flags.writeable = False
+    return array
+
+
 # Constants
 MIN_WALKING_PATH_WIDTH = 0.6  # Minimum width for comfortable walking (meters)
+HALF_WALKING_PATH_WIDTH = MIN_WALKING_PATH_WIDTH / 2
 CLUTTER_THRESHOLD = 0.5  # Room area coverage above which is considered cluttered (50%)
 DOOR_ALIGNMENT_THRESHOLD = 45  # Degrees - bed/door alignment tolerance
 COMMAND_POSITION_ANGLE = 120  # Degrees - ideal viewing angle for desk
 
+# Object type ids used by the packed per-object arrays
+BED, DESK, DOOR, WINDOW, PLANT, WALL, OTHER = range(7)
+OBJECT_TYPE_IDS = MappingProxyType({
+    "bed": BED,
+    "desk": DESK,
+    "door": DOOR,
+    "window": WINDOW,
+    "plant": PLANT,
+    "wall": WALL,
+})
+STRUCTURAL_TYPE_IDS = (DOOR, WINDOW, WALL)  # Not counted as furniture for clutter
+
+# Bagua zones in the fixed order used by the zone score arrays
+BAGUA_ZONES = ("wealth", "fame", "love", "health", "creativity", "knowledge", "career", "family", "balance")
+ZONE_IDX = MappingProxyType({zone: i for i, zone in enumerate(BAGUA_ZONES)})
+BASE_ZONE_SCORES = _read_only(np.array([70, 70, 70, 75, 70, 70, 70, 70, 75], dtype=np.int64))
+RULE_BASE_ZONE_SCORE = 75  # Starting score for zones adjusted by a rule
+
+# Room-specific rule (FengShuiAnalyzer method name) for each normalized room type
+ROOM_TYPE_RULES = MappingProxyType({
+    "bedroom": "_check_bed_facing_door",
+    "office": "_check_desk_command_position",
+})
+
+# Notes shown with each zone in the Bagua analysis
+ZONE_NOTES = MappingProxyType({
+    "wealth": "Wealth zone represents prosperity and abundance",
+    "fame": "Fame zone relates to reputation and recognition",
+    "love": "Love zone governs relationships and partnerships",
+    "health": "Health zone affects physical and mental wellbeing",
+    "creativity": "Creativity zone supports innovation and children",
+    "knowledge": "Knowledge zone enhances learning and wisdom",
+    "career": "Career zone influences professional success",
+    "family": "Family zone impacts relationships with loved ones",
+    "balance": "Balance zone promotes harmony and stability"
+})
+
+# Overall score weights per zone - prioritize health and balance for general wellbeing
+ZONE_WEIGHTS = _read_only(np.array([1.0, 0.8, 1.0, 1.5, 0.8, 0.8, 1.0, 0.8, 1.3], dtype=np.float64))
+
+# Extra sentence appended to every suggestion for the user's room style
+STYLE_CONTEXT = MappingProxyType({
+    "modern": "Consider sleek, minimalist solutions that maintain the modern aesthetic.",
+    "minimalist": "Keep solutions simple and uncluttered to preserve the minimalist vibe.",
+    "traditional": "Traditional Feng Shui principles work well with your decor style.",
+    "zen": "This aligns with Zen philosophy - simplicity and natural flow.",
+    "bohemian": "Bohemian style already embraces natural elements and flow.",
+    "industrial": "Metal and wood elements can enhance energy in industrial spaces.",
+    "contemporary": "Contemporary design can incorporate modern Feng Shui solutions.",
+    "rustic": "Natural materials and earth tones support positive energy flow.",
+    "luxury": "Luxury spaces benefit from attention to detail in energy flow."
+})
+
+# Extra sentence appended to every suggestion for the user's Feng Shui intention
+INTENTION_CONTEXT = MappingProxyType({
+    "wealth": "This improvement supports your wealth intention and financial prosperity.",
+    "career": "This change enhances your career zone and professional success.",
+    "health": "This supports your health focus and overall wellbeing.",
+    "love": "This improvement strengthens relationship energy in your space.",
+    "balance": "This helps achieve the balance you're seeking.",
+    "knowledge": "This supports your learning and wisdom goals.",
+    "creativity": "This enhances creative energy flow in your space.",
+    "family": "This improvement strengthens family connections and harmony.",
+    "fame": "This supports recognition and reputation energy."
+})
+
 
 def calculate_distance(pos1: Position, pos2: Position) -> float:
     """Calculate Euclidean distance between two positions"""
@@ -30,9 +117,132 @@ def normalize_angle(angle: float) -> float:
 
 
 def angle_difference(angle1: float, angle2: float) -> float:
-    """Calculate the smallest difference between two angles"""
-    diff = abs(angle1 - angle2) % 360
-    return min(diff, 360 - diff)
+    """Calculate the smallest difference between two angles (any range, no normalizing needed)"""
+    diff = (angle1 - angle2) % 360
+    return diff if diff <= 180 else 360 - diff
+
+
+def angle_difference_array(angles1: np.ndarray, angles2: np.ndarray) -> np.ndarray:
+    """Elementwise smallest difference between two arrays of angles"""
+    diff = (angles1 - angles2) % 360
+    return np.minimum(diff, 360 - diff)
+
+
+def zone_delta(**deltas: int) -> np.ndarray:
+    """Build a per-zone bonus/penalty vector in BAGUA_ZONES order"""
+    delta = np.zeros(len(BAGUA_ZONES), dtype=np.int64)
+    for zone, value in deltas.items():
+        delta[ZONE_IDX[zone]] = value
+    return _read_only(delta)
+
+
+# Zone bonuses/penalties for each rule outcome, folded into vectors once at import
+BED_ALIGNED_DELTA = zone_delta(health=-25, love=-20)
+BED_GOOD_PLACEMENT_DELTA = zone_delta(health=15, love=10)
+DESK_FACING_WALL_DELTA = zone_delta(career=-30, wealth=-15)
+DESK_COMMAND_DELTA = zone_delta(career=20, wealth=10)
+CLUTTER_ZONE_MASK = zone_delta(wealth=1, health=1, love=1, career=1, balance=1)  # Scaled by the penalty
+# Largest clutter penalty applied: keeps the scaled mask within int64 for absurd coverage
+# ratios, and is far beyond anything the per-object bonuses can add back, so penalized
+# zones still clip to 0 exactly as an unbounded penalty would
+CLUTTER_PENALTY_CAP = 10 ** 15
+ROOM_TOO_EMPTY_DELTA = zone_delta(balance=-8)
+CLUTTER_OPTIMAL_DELTA = zone_delta(balance=10, health=10)
+NO_WINDOWS_DELTA = zone_delta(health=-25, balance=-20)
+WINDOW_OBSTRUCTED_DELTA = zone_delta(health=-15)
+PLANTS_NEAR_WINDOWS_DELTA = zone_delta(health=15, balance=15)
+MULTIPLE_WINDOWS_DELTA = zone_delta(health=10, balance=8)
+PATHS_BLOCKED_DELTA = zone_delta(balance=-20, health=-10)
+PATHS_CLEAR_DELTA = zone_delta(balance=12, health=8)
+
+# Room type bonuses applied during Bagua scoring
+ROOM_TYPE_BONUS_DELTAS = MappingProxyType({
+    "bedroom": zone_delta(love=8, health=8),
+    "office": zone_delta(career=8, knowledge=8),
+    "meditation room": zone_delta(balance=15, health=10),
+})
+INTENTION_BOOST_DELTAS = MappingProxyType({zone: zone_delta(**{zone: 15}) for zone in BAGUA_ZONES})
+
+
+def _build_intention_weights() -> Mapping[Optional[str], Tuple[np.ndarray, float]]:
+    """Zone weights and their total for every possible intention (None = no intention)"""
+    table = {None: (ZONE_WEIGHTS, sum(ZONE_WEIGHTS.tolist()))}
+    for zone, i in ZONE_IDX.items():
+        # Boost intention zone weight significantly (2.5x base)
+        # This makes the overall score reflect their priority
+        weights = ZONE_WEIGHTS.copy()
+        weights[i] *= 2.5
+        table[zone] = (_read_only(weights), sum(weights.tolist()))
+    return MappingProxyType(table)
+
+
+INTENTION_WEIGHTS = _build_intention_weights()
+
+# Per-zone BaguaAnalysis with its fixed notes; each response copies one and fills in the score
+BAGUA_ANALYSIS_TEMPLATES = MappingProxyType({
+    zone: BaguaAnalysis.model_construct(
+        zone=zone,
+        score=0,
+        notes=ZONE_NOTES.get(zone, f"{zone} zone analysis")
+    )
+    for zone in BAGUA_ZONES
+})
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, nogil=True)
+    def _blocking_mask(door_x, door_y, cx, cy, obj_x, obj_y, obj_r, half_w):
+        """Flag objects within half_w + radius of the middle of the door -> center segment"""
+        dx = cx - door_x
+        dy = cy - door_y
+        length_sq = dx * dx + dy * dy
+        n = obj_x.shape[0]
+        out = np.zeros(n, np.bool_)
+        for i in range(n):
+            t = ((obj_x[i] - door_x) * dx + (obj_y[i] - door_y) * dy) / length_sq
+            if t <= 0.1 or t >= 0.9:
+                continue
+            px = obj_x[i] - (door_x + t * dx)
+            py = obj_y[i] - (door_y + t * dy)
+            threshold = half_w + obj_r[i]
+            if px * px + py * py < threshold * threshold:
+                out[i] = True
+        return out
+else:
+    def _blocking_mask(door_x, door_y, cx, cy, obj_x, obj_y, obj_r, half_w):
+        """Flag objects within half_w + radius of the middle of the door -> center segment"""
+        dx = cx - door_x
+        dy = cy - door_y
+        t = ((obj_x - door_x) * dx + (obj_y - door_y) * dy) / (dx * dx + dy * dy)
+        px = obj_x - (door_x + t * dx)
+        py = obj_y - (door_y + t * dy)
+        threshold = half_w + obj_r
+        return (px * px + py * py < threshold * threshold) & (t > 0.1) & (t < 0.9)
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, nogil=True)
+    def _aggregate(scores, weights, total_weight):
+        """Weighted mean of the zone scores, accumulated left to right"""
+        total = 0.0
+        for i in range(scores.shape[0]):
+            total += scores[i] * weights[i]
+        return total / total_weight
+else:
+    def _aggregate(scores, weights, total_weight):
+        """Weighted mean of the zone scores, accumulated left to right"""
+        return sum((scores * weights).tolist()) / total_weight
+
+
+def _warm_up_kernels():
+    """Compile the JIT kernels at import so the first request doesn't pay for it"""
+    if NUMBA_AVAILABLE:
+        sample = np.zeros(1, dtype=np.float64)
+        _blocking_mask(0.0, 0.0, 1.0, 1.0, sample, sample, sample, 0.3)
+        _aggregate(BASE_ZONE_SCORES.copy(), ZONE_WEIGHTS, 1.0)
+
+
+_warm_up_kernels()
 
 
 class FengShuiAnalyzer:
@@ -41,90 +251,131 @@ class FengShuiAnalyzer:
     def __init__(self, request: AnalyzeRoomRequest):
         self.request = request
         self.room_area = request.room_dimensions.length_m * request.room_dimensions.width_m
-        self.room_type = request.room_metadata.room_type.lower() if request.room_metadata.room_type else ""
+        self.room_center = (request.room_dimensions.length_m / 2, request.room_dimensions.width_m / 2)
+        
+        # Lowercase and intern the metadata strings once; rules compare against these
+        metadata = request.room_metadata
+        self.room_type = sys.intern(metadata.room_type.lower()) if metadata.room_type else ""
+        self._style = sys.intern(metadata.room_style.lower()) if metadata.room_style else None
+        self._intention = sys.intern(metadata.feng_shui_intention.lower()) if metadata.feng_shui_intention else None
+        
+        # Style/intention context is the same for every suggestion, so build it once
+        enhancements = []
+        if self._style in STYLE_CONTEXT:
+            enhancements.append(STYLE_CONTEXT[self._style])
+        if self._intention in INTENTION_CONTEXT:
+            enhancements.append(INTENTION_CONTEXT[self._intention])
+        self._context_suffix = " " + " ".join(enhancements) if enhancements else ""
+        
+        # Single pass over the objects: lowercase each type once, assign its type id,
+        # bucket it by type and collect the rows for the packed per-object arrays
+        objects = request.objects
+        type_ids = []
+        buckets: List[List[int]] = [[] for _ in range(OTHER + 1)]
+        self.object_ids_by_type: Dict[str, List[str]] = {}  # lowercased type -> object ids
+        for i, obj in enumerate(objects):
+            type_name = obj.type.lower()
+            type_id = OBJECT_TYPE_IDS.get(type_name, OTHER)
+            type_ids.append(type_id)
+            buckets[type_id].append(i)
+            self.object_ids_by_type.setdefault(type_name, []).append(obj.id)
+        
+        # Parallel arrays (one row per object) so rules can work on whole columns
+        self._type_id = np.array(type_ids, dtype=np.int8)
+        self._xy = np.array(
+            [(obj.position.x, obj.position.y) for obj in objects], dtype=np.float64
+        ).reshape(-1, 2)
+        self._dims = np.array(
+            [(obj.dimensions.length_m, obj.dimensions.width_m) for obj in objects], dtype=np.float64
+        ).reshape(-1, 2)
+        self._rot = np.array([obj.rotation_deg for obj in objects], dtype=np.float64)
+        
+        # Per-object values the rules reuse: floor area and whether the object is
+        # large and non-structural enough to block a window's light
+        self._area = self._dims[:, 0] * self._dims[:, 1]
+        light_blocker = (self._type_id != WINDOW) & (self._type_id != DOOR) & (self._area > 0.5)
+        self._blocker_idx = np.flatnonzero(light_blocker)
+        self._blocker_xy = self._xy[self._blocker_idx]
+        
+        # Radius of each object's footprint, for the walking path check
+        self._radius = self._dims.max(axis=1) / 2
+        
+        # Indices of each object type into the packed arrays
+        self._bed_idx = np.array(buckets[BED], dtype=np.intp)
+        self._desk_idx = np.array(buckets[DESK], dtype=np.intp)
+        self._door_idx = np.array(buckets[DOOR], dtype=np.intp)
+        self._window_idx = np.array(buckets[WINDOW], dtype=np.intp)
+        self._plant_idx = np.array(buckets[PLANT], dtype=np.intp)
         
         # Separate objects by type
-        self.beds = [obj for obj in request.objects if obj.type.lower() == "bed"]
-        self.desks = [obj for obj in request.objects if obj.type.lower() == "desk"]
-        self.doors = [obj for obj in request.objects if obj.type.lower() == "door"]
-        self.windows = [obj for obj in request.objects if obj.type.lower() == "window"]
-        self.plants = [obj for obj in request.objects if obj.type.lower() == "plant"]
+        self.beds = [objects[i] for i in buckets[BED]]
+        self.desks = [objects[i] for i in buckets[DESK]]
+        self.doors = [objects[i] for i in buckets[DOOR]]
+        self.windows = [objects[i] for i in buckets[WINDOW]]
+        self.plants = [objects[i] for i in buckets[PLANT]]
         
         self.suggestions: List[Suggestion] = []
-        self.zone_scores: Dict[str, float] = {}
+        self._pending_suggestions: List[Tuple[str, str, str, str, Tuple[str, ...]]] = []
+        self.zone_scores: Dict[str, int] = {}
+        
+        # Rule bonuses/penalties accumulate in a fixed-order array (see BAGUA_ZONES).
+        # Any zone a rule touches starts from 75; untouched zones use BASE_ZONE_SCORES.
+        # int64 so scores can run far outside 0-100 (e.g. hundreds of desks facing the
+        # wall) without wrapping; they are only clipped in _calculate_bagua_scores
+        self._zs = np.full(len(BAGUA_ZONES), RULE_BASE_ZONE_SCORE, dtype=np.int64)
+        self._zone_touched = np.zeros(len(BAGUA_ZONES), dtype=np.bool_)
         
         # Track rule violations and compliances for AI context
         self.rule_violations: List[str] = []  # e.g., ["bed_door_alignment", "clutter_density"]
         self.rule_compliances: List[str] = []  # e.g., ["bed_good_placement", "natural_light_excellent"]
     
+    def _apply_zone_delta(self, delta: np.ndarray):
+        """Add a rule's per-zone bonus/penalty vector; every non-zero zone counts as adjusted"""
+        self._zs += delta
+        self._zone_touched |= delta != 0
+    
     # Helper methods for suggestions
     def _add_suggestion(self, id_str: str, title: str, description: str, 
                        severity: str, related_object_ids: List[str] = None):
         """Helper method to add suggestions with consistent formatting"""
-        if related_object_ids is None:
-            related_object_ids = []
-        
-        # Enhance description with context if available
-        description = self._enhance_description_with_context(description)
-        
-        self.suggestions.append(Suggestion(
-            id=id_str,
-            title=title,
-            description=description,
-            severity=severity,
-            related_object_ids=related_object_ids
-        ))
+        # Buffered as plain tuples; Suggestion models are built once in _build_suggestions
+        self._pending_suggestions.append(
+            (id_str, title, description, severity, tuple(related_object_ids or ()))
+        )
+    
+    def _build_suggestions(self) -> List[Suggestion]:
+        """Create Suggestion models for every buffered suggestion, in the order they were added"""
+        # Built from our own typed values, so skip pydantic validation
+        construct = Suggestion.model_construct
+        enhance = self._enhance_description_with_context
+        return [
+            construct(
+                id=id_str,
+                title=title,
+                description=enhance(description),
+                severity=severity,
+                related_object_ids=list(related_object_ids)
+            )
+            for id_str, title, description, severity, related_object_ids in self._pending_suggestions
+        ]
     
     def _enhance_description_with_context(self, description: str) -> str:
         """Enhance description with room_style and intention context"""
-        metadata = self.request.room_metadata
-        enhancements = []
-        
-        if metadata.room_style:
-            style_context = {
-                "modern": "Consider sleek, minimalist solutions that maintain the modern aesthetic.",
-                "minimalist": "Keep solutions simple and uncluttered to preserve the minimalist vibe.",
-                "traditional": "Traditional Feng Shui principles work well with your decor style.",
-                "zen": "This aligns with Zen philosophy - simplicity and natural flow.",
-                "bohemian": "Bohemian style already embraces natural elements and flow.",
-                "industrial": "Metal and wood elements can enhance energy in industrial spaces.",
-                "contemporary": "Contemporary design can incorporate modern Feng Shui solutions.",
-                "rustic": "Natural materials and earth tones support positive energy flow.",
-                "luxury": "Luxury spaces benefit from attention to detail in energy flow."
-            }
-            if metadata.room_style.lower() in style_context:
-                enhancements.append(style_context[metadata.room_style.lower()])
-        
-        if metadata.feng_shui_intention:
-            intention_context = {
-                "wealth": "This improvement supports your wealth intention and financial prosperity.",
-                "career": "This change enhances your career zone and professional success.",
-                "health": "This supports your health focus and overall wellbeing.",
-                "love": "This improvement strengthens relationship energy in your space.",
-                "balance": "This helps achieve the balance you're seeking.",
-                "knowledge": "This supports your learning and wisdom goals.",
-                "creativity": "This enhances creative energy flow in your space.",
-                "family": "This improvement strengthens family connections and harmony.",
-                "fame": "This supports recognition and reputation energy."
-            }
-            if metadata.feng_shui_intention.lower() in intention_context:
-                enhancements.append(intention_context[metadata.feng_shui_intention.lower()])
-        
-        if enhancements:
-            return description + " " + " ".join(enhancements)
+        if self._context_suffix:
+            return description + self._context_suffix
         return description
     
     def analyze(self) -> Tuple[int, List[BaguaAnalysis], List[Suggestion], Dict[str, List[str]]]:
         # Run all rule checks based on room type
-        if self.room_type == "bedroom":
-            self._check_bed_facing_door()
-        elif self.room_type == "office":
-            self._check_desk_command_position()
+        room_rule = ROOM_TYPE_RULES.get(self.room_type)
+        if room_rule:
+            getattr(self, room_rule)()
         
         # Universal rules (apply to all rooms)
         self._check_clutter_density()
         self._check_natural_light()
         self._check_walking_paths()
+        suggestions = self.suggestions = self._build_suggestions()
         
         # Calculate zone scores
         self._calculate_bagua_scores()
@@ -136,7 +387,7 @@ class FengShuiAnalyzer:
         highlight_objects = self._get_highlight_objects()
         recommended_zones = self._get_recommended_zones()
         
-        return (overall_score, self._get_bagua_analysis_list(), self.suggestions, {
+        return (overall_score, self._get_bagua_analysis_list(), suggestions, {
             "highlight_objects": highlight_objects,
             "recommended_zones": recommended_zones
         })
@@ -147,68 +398,61 @@ class FengShuiAnalyzer:
         if not self.beds or not self.doors:
             return
         
-        for bed in self.beds:
-            bed_center = bed.position
+        # Pairwise bed -> door deltas (rows: beds, columns: doors)
+        bed_xy = self._xy[self._bed_idx]
+        door_xy = self._xy[self._door_idx]
+        dx = door_xy[None, :, 0] - bed_xy[:, None, 0]
+        dy = door_xy[None, :, 1] - bed_xy[:, None, 1]
+        distance_sq = dx * dx + dy * dy
+        
+        # Calculate angle from bed to door
+        angle_to_door = np.degrees(np.arctan2(dy, dx))
+        
+        # Bed rotation determines orientation
+        # A bed can be aligned with door if either head or foot faces the door
+        # Bed has two directions (rotation and rotation+180), and the door counts whether it
+        # is in front of or behind either one, so the four angle differences collapse to
+        # diff and 180 - diff
+        diff = angle_difference_array(self._rot[self._bed_idx][:, None], angle_to_door)
+        min_alignment_diff = np.minimum(diff, 180 - diff)
+        aligned = min_alignment_diff < DOOR_ALIGNMENT_THRESHOLD
+        well_placed = min_alignment_diff > 60
+        
+        # One decision per bed: alignment with any door wins, otherwise a single
+        # positive suggestion if at least one door is well away from the bed's axis
+        for bed_i, bed in enumerate(self.beds):
+            aligned_doors = np.flatnonzero(aligned[bed_i])
             
-            for door in self.doors:
-                door_center = door.position
-                distance = calculate_distance(bed_center, door_center)
-                
-                # Calculate angle from bed to door
-                dx = door_center.x - bed_center.x
-                dy = door_center.y - bed_center.y
-                angle_to_door = math.degrees(math.atan2(dy, dx))
-                if angle_to_door < 0:
-                    angle_to_door += 360
+            if aligned_doors.size:
+                # Bad: bed is aligned with door
+                door_i = aligned_doors[0]
+                door = self.doors[door_i]
+                severity = "high" if distance_sq[bed_i, door_i] < 3.0 ** 2 else "medium"
                 
-                # Bed rotation determines orientation
-                # A bed can be aligned with door if either head or foot faces the door
-                bed_rotation = normalize_angle(bed.rotation_deg)
-                
-                # Bed has two directions: one at rotation, one at rotation+180
-                bed_direction_1 = bed_rotation
-                bed_direction_2 = (bed_rotation + 180) % 360
-                
-                # Check if either bed direction aligns with door direction (within threshold)
-                # Also check if bed is aligned with opposite direction (door behind bed)
-                diff_1 = angle_difference(bed_direction_1, angle_to_door)
-                diff_2 = angle_difference(bed_direction_2, angle_to_door)
-                diff_opposite_1 = angle_difference(bed_direction_1, (angle_to_door + 180) % 360)
-                diff_opposite_2 = angle_difference(bed_direction_2, (angle_to_door + 180) % 360)
+                self._add_suggestion(
+                    id_str=f"bed_door_alignment_{bed.id}",
+                    title="Move bed away from door alignment",
+                    description=f"Your bed is positioned in line with the door entrance, which disrupts energy flow and can reduce rest quality. Position your bed so it's not directly aligned with the door (ideally at a 45-degree angle or perpendicular).",
+                    severity=severity,
+                    related_object_ids=[bed.id, door.id]
+                )
                 
-                # Bed is aligned if any direction matches door or door's opposite
-                min_alignment_diff = min(diff_1, diff_2, diff_opposite_1, diff_opposite_2)
+                self._apply_zone_delta(BED_ALIGNED_DELTA)
+                return
+            elif well_placed[bed_i].any():
+                # Good: bed is well-positioned, not aligned with door
+                # Bonus for proper bed placement
+                self._apply_zone_delta(BED_GOOD_PLACEMENT_DELTA)
                 
-                if min_alignment_diff < DOOR_ALIGNMENT_THRESHOLD:
-                    # Bad: bed is aligned with door
-                    severity = "high" if distance < 3.0 else "medium"
-                    
-                    self._add_suggestion(
-                        id_str=f"bed_door_alignment_{bed.id}",
-                        title="Move bed away from door alignment",
-                        description=f"Your bed is positioned in line with the door entrance, which disrupts energy flow and can reduce rest quality. Position your bed so it's not directly aligned with the door (ideally at a 45-degree angle or perpendicular).",
-                        severity=severity,
-                        related_object_ids=[bed.id, door.id]
-                    )
-                    
-                    self.zone_scores["health"] = self.zone_scores.get("health", 75) - 25
-                    self.zone_scores["love"] = self.zone_scores.get("love", 75) - 20
-                    return
-                elif min_alignment_diff > 60:
-                    # Good: bed is well-positioned, not aligned with door
-                    # Bonus for proper bed placement
-                    self.zone_scores["health"] = self.zone_scores.get("health", 75) + 15
-                    self.zone_scores["love"] = self.zone_scores.get("love", 75) + 10
-                    
-                    # Positive suggestion for good bed placement
-                    self._add_suggestion(
-                        id_str=f"bed_good_placement_{bed.id}",
-                        title="Excellent bed placement",
-                        description=f"Your bed is well-positioned away from the door entrance, which promotes restful sleep and positive energy flow. This placement supports health and relationship energy in your bedroom.",
-                        severity="low",
-                        related_object_ids=[bed.id]
-                    )
-                    self.rule_compliances.append("bed_good_placement")
+                # Positive suggestion for good bed placement
+                self._add_suggestion(
+                    id_str=f"bed_good_placement_{bed.id}",
+                    title="Excellent bed placement",
+                    description=f"Your bed is well-positioned away from the door entrance, which promotes restful sleep and positive energy flow. This placement supports health and relationship energy in your bedroom.",
+                    severity="low",
+                    related_object_ids=[bed.id]
+                )
+                self.rule_compliances.append("bed_good_placement")
     
     # RULE 2: DESK COMMAND POSITION (OFFICE) 
     def _check_desk_command_position(self):
@@ -216,31 +460,26 @@ class FengShuiAnalyzer:
         if not self.desks or not self.doors:
             return
         
-        for desk in self.desks:
-            desk_center = desk.position
-            
-            # Find closest door (main entrance)
-            closest_door = min(self.doors, key=lambda d: calculate_distance(desk_center, d.position))
-            door_pos = closest_door.position
-            
-            # Calculate angle from desk to door
-            dx = door_pos.x - desk_center.x
-            dy = door_pos.y - desk_center.y
-            angle_to_door = math.degrees(math.atan2(dy, dx))
-            if angle_to_door < 0:
-                angle_to_door += 360
-            
-            # Check if desk is facing the door/room (good) or facing wall (bad)
-            # Rotation represents the direction the desk front is facing (where person sits)
-            # Typically rotation 0° = facing right/east, 90° = facing up/north, 180° = west, 270° = south
-            desk_rotation = normalize_angle(desk.rotation_deg)
-            
-            # The desk "facing" direction (where the person sits, front of desk) is the rotation
-            desk_facing = desk_rotation
-            
-            # Calculate difference between desk facing direction and direction to door
-            facing_diff = angle_difference(desk_facing, angle_to_door)
-            
+        # Pairwise desk -> door offsets, one row per desk
+        desk_xy = self._xy[self._desk_idx]
+        door_xy = self._xy[self._door_idx]
+        dx = door_xy[None, :, 0] - desk_xy[:, None, 0]
+        dy = door_xy[None, :, 1] - desk_xy[:, None, 1]
+        
+        # Find closest door (main entrance) for every desk
+        rows = np.arange(len(self.desks))
+        closest = np.argmin(dx * dx + dy * dy, axis=1)
+        
+        # Calculate angle from desk to door
+        angle_to_door = np.degrees(np.arctan2(dy[rows, closest], dx[rows, closest]))
+        
+        # Check if desk is facing the door/room (good) or facing wall (bad)
+        # Rotation represents the direction the desk front is facing (where person sits)
+        # Typically rotation 0° = facing right/east, 90° = facing up/north, 180° = west, 270° = south
+        # The desk "facing" direction (where the person sits, front of desk) is the rotation
+        facing_diffs = angle_difference_array(self._rot[self._desk_idx], angle_to_door)
+        
+        for desk, facing_diff in zip(self.desks, facing_diffs.tolist()):
             # Desk is in command position if facing within ±60° of door direction
             # If facing >90° away from door, it's facing the wall (bad)
             if facing_diff > 90:  # Desk facing away from door (facing wall)
@@ -253,12 +492,10 @@ class FengShuiAnalyzer:
                 )
                 self.rule_violations.append("desk_command_position")
                 
-                self.zone_scores["career"] = self.zone_scores.get("career", 75) - 30
-                self.zone_scores["wealth"] = self.zone_scores.get("wealth", 75) - 15
+                self._apply_zone_delta(DESK_FACING_WALL_DELTA)
             elif facing_diff < 60:  # Desk facing toward door (good position)
                 # Good position - boost career zone significantly
-                self.zone_scores["career"] = self.zone_scores.get("career", 75) + 20
-                self.zone_scores["wealth"] = self.zone_scores.get("wealth", 75) + 10
+                self._apply_zone_delta(DESK_COMMAND_DELTA)
                 
                 # Positive suggestion for good command position
                 self._add_suggestion(
@@ -277,14 +514,11 @@ class FengShuiAnalyzer:
             return
         
         # Calculate total area covered by furniture (excluding structural elements)
-        structural_types = {"door", "window", "wall"}
-        furniture_objects = [obj for obj in self.request.objects 
-                           if obj.type.lower() not in structural_types]
-        
-        if not furniture_objects:
+        furniture_mask = ~np.isin(self._type_id, STRUCTURAL_TYPE_IDS)
+        if not furniture_mask.any():
             return
         
-        total_furniture_area = sum(calculate_object_area(obj) for obj in furniture_objects)
+        total_furniture_area = sum(self._area[furniture_mask].tolist())
         coverage_ratio = total_furniture_area / self.room_area if self.room_area > 0 else 0
         
         if coverage_ratio > CLUTTER_THRESHOLD:
@@ -301,15 +535,14 @@ class FengShuiAnalyzer:
             
             # Penalty to all zones - more severe for high clutter
             penalty_multiplier = 20 if coverage_ratio > 0.75 else 15
-            for zone in ["wealth", "health", "love", "career", "balance"]:
-                self.zone_scores[zone] = self.zone_scores.get(zone, 75) - int(penalty_multiplier * coverage_ratio)
+            penalty = int(min(penalty_multiplier * coverage_ratio, CLUTTER_PENALTY_CAP))
+            self._apply_zone_delta(CLUTTER_ZONE_MASK * -penalty)
         elif coverage_ratio < 0.2:
             # Too empty - also not ideal (but less severe)
-            self.zone_scores["balance"] = self.zone_scores.get("balance", 75) - 8
+            self._apply_zone_delta(ROOM_TOO_EMPTY_DELTA)
         elif 0.3 <= coverage_ratio <= 0.45:
             # Good balance - bonus for optimal spacing
-            for zone in ["balance", "health"]:
-                self.zone_scores[zone] = self.zone_scores.get(zone, 75) + 10
+            self._apply_zone_delta(CLUTTER_OPTIMAL_DELTA)
             
             # Positive suggestion for optimal clutter balance
             self._add_suggestion(
@@ -335,52 +568,35 @@ class FengShuiAnalyzer:
             )
             self.rule_violations.append("no_windows")
             
-            self.zone_scores["health"] = self.zone_scores.get("health", 75) - 25
-            self.zone_scores["balance"] = self.zone_scores.get("balance", 75) - 20
+            self._apply_zone_delta(NO_WINDOWS_DELTA)
             return
         
         # Check if windows are obstructed by large furniture
+        windows_unobstructed = True
         for window in self.windows:
             window_pos = window.position
             
             # Find objects close to windows
-            obstructing_objects = []
-            for obj in self.request.objects:
-                if obj.type.lower() in {"window", "door"}:
-                    continue
-                
-                distance = calculate_distance(window_pos, obj.position)
-                # If large object is very close to window, it might block light
-                if distance < 1.0 and calculate_object_area(obj) > 0.5:
-                    obstructing_objects.append(obj)
+            # If large object is very close to window (within 1m), it might block light
+            dx = self._blocker_xy[:, 0] - window_pos.x
+            dy = self._blocker_xy[:, 1] - window_pos.y
+            obstructing_idx = self._blocker_idx[dx * dx + dy * dy < 1.0]
+            obstructing_objects = [self.request.objects[i] for i in obstructing_idx[:3]]
             
             if obstructing_objects:
+                windows_unobstructed = False
                 self._add_suggestion(
                     id_str=f"window_obstruction_{window.id}",
                     title="Clear space around windows",
                     description=f"Furniture is positioned too close to windows, blocking natural light. Move objects at least 1 meter away from windows to allow positive energy (chi) to flow freely into the room.",
                     severity="medium",
-                    related_object_ids=[w.id for w in [window] + obstructing_objects[:3]]
+                    related_object_ids=[w.id for w in [window] + obstructing_objects]
                 )
                 self.rule_violations.append("window_obstruction")
                 
-                self.zone_scores["health"] = self.zone_scores.get("health", 75) - 15
-        
-        # Having plants near windows is good - significant bonus
-        windows_unobstructed = True
-        for window in self.windows:
-            window_pos = window.position
-            obstructing = [
-                obj for obj in self.request.objects
-                if obj.type.lower() not in {"window", "door"}
-                and calculate_distance(window_pos, obj.position) < 1.0
-                and calculate_object_area(obj) > 0.5
-            ]
-            if obstructing:
-                windows_unobstructed = False
-                break
+                self._apply_zone_delta(WINDOW_OBSTRUCTED_DELTA)
         
-        if windows_unobstructed and self.windows:
+        if windows_unobstructed:
             # Positive suggestion for unobstructed windows
             window_count_text = "multiple windows" if len(self.windows) >= 2 else "window"
             self._add_suggestion(
@@ -392,15 +608,16 @@ class FengShuiAnalyzer:
             )
             self.rule_compliances.append("natural_light_excellent")
         
+        # Having plants near windows is good - significant bonus
         if self.plants and self.windows:
-            plant_window_proximity = any(
-                calculate_distance(plant.position, window.position) < 2.0
-                for plant in self.plants
-                for window in self.windows
-            )
+            # Pairwise plant -> window squared distances (rows: plants, columns: windows)
+            plant_xy = self._xy[self._plant_idx]
+            window_xy = self._xy[self._window_idx]
+            dx = plant_xy[:, None, 0] - window_xy[None, :, 0]
+            dy = plant_xy[:, None, 1] - window_xy[None, :, 1]
+            plant_window_proximity = bool((dx * dx + dy * dy < 2.0 ** 2).any())
             if plant_window_proximity:
-                self.zone_scores["health"] = self.zone_scores.get("health", 75) + 15
-                self.zone_scores["balance"] = self.zone_scores.get("balance", 75) + 15
+                self._apply_zone_delta(PLANTS_NEAR_WINDOWS_DELTA)
                 
                 # Positive suggestion for plants near windows
                 self._add_suggestion(
@@ -414,8 +631,7 @@ class FengShuiAnalyzer:
         
         # Bonus for having multiple windows (good natural light)
         if len(self.windows) >= 2:
-            self.zone_scores["health"] = self.zone_scores.get("health", 75) + 10
-            self.zone_scores["balance"] = self.zone_scores.get("balance", 75) + 8
+            self._apply_zone_delta(MULTIPLE_WINDOWS_DELTA)
     
     # RULE 5: CLEAR WALKING PATHS 
     def _check_walking_paths(self):
@@ -425,147 +641,89 @@ class FengShuiAnalyzer:
         
         # Check distances between objects (simple heuristic)
         # In a proper implementation, we'd do pathfinding, but for MVP this works
-        min_path_width = MIN_WALKING_PATH_WIDTH
+        
+        # No door means no entrance path to check
+        if not self.doors:
+            return
         
         # Check path from door to center of room
-        if self.doors:
-            door = self.doors[0]
-            room_center = Position(
-                x=self.request.room_dimensions.length_m / 2,
-                y=self.request.room_dimensions.width_m / 2
+        door = self.doors[0]
+        center_x, center_y = self.room_center
+        
+        # Find objects that might block the path from door to center
+        # We check if objects are close to the direct line from door to center
+        blocking_objects = []
+        door_pos = door.position
+        
+        # If door and center are at same point, nothing can block the path
+        center_dx = center_x - door_pos.x
+        center_dy = center_y - door_pos.y
+        if center_dx * center_dx + center_dy * center_dy >= 0.1 ** 2:
+            candidates = np.flatnonzero(self._type_id != DOOR)
+            
+            # Object blocks if its distance to the middle of the segment (0.1 < t < 0.9)
+            # is less than half the minimum path width + object radius
+            mask = _blocking_mask(
+                door_pos.x, door_pos.y, center_x, center_y,
+                self._xy[candidates, 0], self._xy[candidates, 1], self._radius[candidates],
+                HALF_WALKING_PATH_WIDTH
             )
+            blocking_objects = [self.request.objects[i] for i in candidates[mask]]
+        
+        if len(blocking_objects) >= 2: 
+            self._add_suggestion(
+                id_str="walking_paths_blocked",
+                title="Clear walking paths",
+                description=f"Multiple objects are blocking clear pathways through the room. Maintain at least {MIN_WALKING_PATH_WIDTH*100:.0f}cm clear space for walking paths to allow energy (chi) to flow freely. This reduces obstacles and promotes positive movement.",
+                severity="medium",
+                related_object_ids=[obj.id for obj in blocking_objects[:5]]
+            )
+            self.rule_violations.append("walking_paths_blocked")
             
-            # Find objects that might block the path from door to center
-            # We check if objects are close to the direct line from door to center
-            blocking_objects = []
-            door_pos = door.position
+            self._apply_zone_delta(PATHS_BLOCKED_DELTA)
+        elif len(blocking_objects) == 0:
+            # Good: clear paths throughout room
+            self._apply_zone_delta(PATHS_CLEAR_DELTA)
             
-            for obj in self.request.objects:
-                if obj.type.lower() == "door":
-                    continue
-                
-                obj_pos = obj.position
-                door_to_center_dist = calculate_distance(door_pos, room_center)
-                
-                # Calculate distance from object to the line segment from door to center
-                # Using perpendicular distance from point to line
-                dx = room_center.x - door_pos.x
-                dy = room_center.y - door_pos.y
-                
-                # If door and center are at same point, skip
-                if door_to_center_dist < 0.1:
-                    continue
-                
-                # Vector from door to object
-                obj_dx = obj_pos.x - door_pos.x
-                obj_dy = obj_pos.y - door_pos.y
-                
-                # Project object position onto door-center line
-                t = (obj_dx * dx + obj_dy * dy) / (door_to_center_dist ** 2)
-                t = max(0, min(1, t))  # Clamp to [0, 1] for line segment
-                
-                # Closest point on line segment to object
-                closest_x = door_pos.x + t * dx
-                closest_y = door_pos.y + t * dy
-                closest_point = Position(x=closest_x, y=closest_y)
-                
-                # Distance from object to line
-                dist_to_line = calculate_distance(obj_pos, closest_point)
-                
-                # Object is blocking if it's close to the line AND within the segment
-                # Also consider object size
-                obj_radius = max(obj.dimensions.length_m, obj.dimensions.width_m) / 2
-                
-                # Object blocks if distance to line is less than min_path_width/2 + object_radius
-                if dist_to_line < (min_path_width / 2 + obj_radius) and 0.1 < t < 0.9:
-                    blocking_objects.append(obj)
-            
-            if len(blocking_objects) >= 2: 
-                self._add_suggestion(
-                    id_str="walking_paths_blocked",
-                    title="Clear walking paths",
-                    description=f"Multiple objects are blocking clear pathways through the room. Maintain at least {min_path_width*100:.0f}cm clear space for walking paths to allow energy (chi) to flow freely. This reduces obstacles and promotes positive movement.",
-                    severity="medium",
-                    related_object_ids=[obj.id for obj in blocking_objects[:5]]
-                )
-                self.rule_violations.append("walking_paths_blocked")
-                
-                self.zone_scores["balance"] = self.zone_scores.get("balance", 75) - 20
-                self.zone_scores["health"] = self.zone_scores.get("health", 75) - 10
-            elif len(blocking_objects) == 0:
-                # Good: clear paths throughout room
-                self.zone_scores["balance"] = self.zone_scores.get("balance", 75) + 12
-                self.zone_scores["health"] = self.zone_scores.get("health", 75) + 8
-                
-                # Positive suggestion for clear walking paths
-                self._add_suggestion(
-                    id_str="walking_paths_clear",
-                    title="Clear pathways throughout room",
-                    description=f"Your room has excellent clear pathways from the entrance to all areas. Maintain at least {min_path_width*100:.0f}cm clear space allows energy (chi) to flow freely, promoting movement and positive energy circulation. This supports balance and overall wellbeing.",
-                    severity="low",
-                    related_object_ids=[]
-                )
-                self.rule_compliances.append("walking_paths_clear")
+            # Positive suggestion for clear walking paths
+            self._add_suggestion(
+                id_str="walking_paths_clear",
+                title="Clear pathways throughout room",
+                description=f"Your room has excellent clear pathways from the entrance to all areas. Maintain at least {MIN_WALKING_PATH_WIDTH*100:.0f}cm clear space allows energy (chi) to flow freely, promoting movement and positive energy circulation. This supports balance and overall wellbeing.",
+                severity="low",
+                related_object_ids=[]
+            )
+            self.rule_compliances.append("walking_paths_clear")
     
     # BAGUA ZONE SCORING 
     def _calculate_bagua_scores(self):
         # Calculate scores for each Bagua zone based on room analysis
-        # Initialize base scores
-        base_scores = {
-            "wealth": 70,
-            "fame": 70,
-            "love": 70,
-            "health": 75,
-            "creativity": 70,
-            "knowledge": 70,
-            "career": 70,
-            "family": 70,
-            "balance": 75
-        }
-        
-        # Merge with calculated zone scores (which may have penalties)
-        for zone in base_scores:
-            if zone in self.zone_scores:
-                base_scores[zone] = self.zone_scores[zone]
+        # Zones adjusted by a rule keep their adjusted score, the rest use the base score
+        scores = np.where(self._zone_touched, self._zs, BASE_ZONE_SCORES)
         
         # Apply room type bonuses - increased for better range
-        if self.room_type == "bedroom":
-            base_scores["love"] = base_scores.get("love", 70) + 8
-            base_scores["health"] = base_scores.get("health", 75) + 8
-        elif self.room_type == "office":
-            base_scores["career"] = base_scores.get("career", 70) + 8
-            base_scores["knowledge"] = base_scores.get("knowledge", 70) + 8
-        elif self.room_type == "meditation room":
-            base_scores["balance"] = base_scores.get("balance", 75) + 15
-            base_scores["health"] = base_scores.get("health", 75) + 10
+        room_bonus = ROOM_TYPE_BONUS_DELTAS.get(self.room_type)
+        if room_bonus is not None:
+            scores += room_bonus
         
         # Boost intention zone if specified - increased bonus
-        intention = self.request.room_metadata.feng_shui_intention
-        if intention and intention in base_scores:
-            base_scores[intention] = min(100, base_scores[intention] + 15)
+        intention_boost = INTENTION_BOOST_DELTAS.get(self._intention)
+        if intention_boost is not None:
+            scores += intention_boost
         
-        # Clamp scores to 0-100
-        self.zone_scores = {zone: max(0, min(100, int(score))) 
-                           for zone, score in base_scores.items()}
+        # Clamp scores to 0-100 (also caps the intention boost)
+        self._final_zs = np.clip(scores, 0, 100)
+        self.zone_scores = dict(zip(BAGUA_ZONES, self._final_zs.tolist()))
     
     def _get_bagua_analysis_list(self) -> List[BaguaAnalysis]:
         """Convert zone scores to BaguaAnalysis list"""
-        zone_notes = {
-            "wealth": "Wealth zone represents prosperity and abundance",
-            "fame": "Fame zone relates to reputation and recognition",
-            "love": "Love zone governs relationships and partnerships",
-            "health": "Health zone affects physical and mental wellbeing",
-            "creativity": "Creativity zone supports innovation and children",
-            "knowledge": "Knowledge zone enhances learning and wisdom",
-            "career": "Career zone influences professional success",
-            "family": "Family zone impacts relationships with loved ones",
-            "balance": "Balance zone promotes harmony and stability"
-        }
+        intention = self._intention
+        zone_scores = self.zone_scores
         
         # Only include relevant zones (not all 9 for every response)
         relevant_zones = ["wealth", "health", "love", "career"]
-        if self.request.room_metadata.feng_shui_intention:
-            relevant_zones.append(self.request.room_metadata.feng_shui_intention)
+        if intention:
+            relevant_zones.append(intention)
         
         # Add balance for most rooms
         if self.room_type in ["meditation room", "bedroom"]:
@@ -576,13 +734,9 @@ class FengShuiAnalyzer:
         unique_zones = [z for z in relevant_zones if not (z in seen or seen.add(z))]
         
         return [
-            BaguaAnalysis(
-                zone=zone,
-                score=self.zone_scores.get(zone, 70),
-                notes=zone_notes.get(zone, f"{zone} zone analysis")
-            )
+            BAGUA_ANALYSIS_TEMPLATES[zone].model_copy(update={"score": zone_scores[zone]})
             for zone in unique_zones
-            if zone in self.zone_scores
+            if zone in zone_scores
         ]
     
     # OVERALL SCORING 
@@ -591,58 +745,37 @@ class FengShuiAnalyzer:
         if not self.zone_scores:
             return 75
         
-        # Base weights - prioritize health and balance for general wellbeing
-        base_weights = {
-            "health": 1.5,
-            "balance": 1.3,
-            "wealth": 1.0,
-            "love": 1.0,
-            "career": 1.0,
-            "knowledge": 0.8,
-            "creativity": 0.8,
-            "fame": 0.8,
-            "family": 0.8
-        }
-        
         # If user specified a feng_shui_intention, heavily weight that zone
-        intention = self.request.room_metadata.feng_shui_intention
-        weights = base_weights.copy()
-        
-        if intention and intention in weights:
-            # Boost intention zone weight significantly (2.5x base)
-            # This makes the overall score reflect their priority
-            weights[intention] = weights.get(intention, 1.0) * 2.5
+        weights, total_weight = INTENTION_WEIGHTS.get(self._intention, INTENTION_WEIGHTS[None])
         
-        total_score = 0
-        total_weight = 0
-        
-        for zone, score in self.zone_scores.items():
-            weight = weights.get(zone, 1.0)
-            total_score += score * weight
-            total_weight += weight
-        
-        overall = int(total_score / total_weight) if total_weight > 0 else 75
+        # Summed left to right (not np.dot/np.sum) so the truncated score doesn't
+        # shift with the summation order
+        overall = int(_aggregate(self._final_zs, weights, total_weight)) if total_weight > 0 else 75
         return max(0, min(100, overall))
     
     def _get_highlight_objects(self) -> List[str]:
         """Get object IDs that should be highlighted (problematic objects)"""
-        highlight_ids = []
-        for suggestion in self.suggestions:
-            if suggestion.severity == "high" and suggestion.related_object_ids:
-                highlight_ids.extend(suggestion.related_object_ids[:2])
-        return list(set(highlight_ids))  # Remove duplicates
+        # Read from the buffered suggestion tuples rather than the models' attributes
+        # dict.fromkeys removes duplicates while keeping suggestion order
+        return list(dict.fromkeys(
+            object_id
+            for _, _, _, severity, related_object_ids in self._pending_suggestions
+            if severity == "high"
+            for object_id in related_object_ids[:2]
+        ))
     
     def _get_recommended_zones(self) -> List[str]:
         # Get recommended zones based on intention and high scores
         zones = []
+        intention = self._intention
         
         # Add intention if specified
-        if self.request.room_metadata.feng_shui_intention:
-            zones.append(self.request.room_metadata.feng_shui_intention)
+        if intention:
+            zones.append(intention)
         
-        # Add top 2 scoring zones
-        sorted_zones = sorted(self.zone_scores.items(), key=lambda x: x[1], reverse=True)
-        for zone, score in sorted_zones[:2]:
+        # Add top 2 scoring zones (ties keep zone order, same as a stable sort)
+        top_zones = heapq.nlargest(2, self.zone_scores.items(), key=lambda x: x[1])
+        for zone, score in top_zones:
             if zone not in zones:
                 zones.append(zone)
         
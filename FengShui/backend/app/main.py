@@ -1,24 +1,27 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from app.config import CORS_ALLOW_ORIGINS, CORS_MAX_AGE
 from app.routes.analyze import router as analyze_router
 
 app = FastAPI(
     title="Feng Shui Room Analyzer API",
     description="API for analyzing room layouts using Feng Shui principles",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware (who can call the API)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ALLOW_ORIGINS,  # In production, set CORS_ALLOW_ORIGINS to exact origins
+    allow_credentials=False,  # Credentials with a wildcard origin are invalid per the CORS spec
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type"],
+    max_age=CORS_MAX_AGE,
 )
 
 # Include routers
@@ -44,20 +47,25 @@ async def health_check():
 # Handles HTTP exceptions
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"error": exc.detail, "status_code": exc.status_code}
     )
 
 
 # Handles validation errors
+# Only type/loc/msg are returned - the echoed input (possibly the whole objects list),
+# docs url and ctx just inflate the response
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "error": "Validation error",
-            "details": exc.errors(),
+            "details": [
+                {"type": error["type"], "loc": error["loc"], "msg": error["msg"]}
+                for error in exc.errors()
+            ],
             "status_code": 422
         }
     )
@@ -66,7 +74,7 @@ async def validation_exception_handler(request, exc):
 # Handles unexpected errors
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
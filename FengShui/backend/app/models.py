@@ -1,18 +1,25 @@
 from typing import List, Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 TOO_LARGE_DIMENSION = 10000
 
+# Models are never mutated after they are created, so make them read-only
+FROZEN = ConfigDict(frozen=True)
+
 ## Request models
 
 # 2D position of an object in the room
 class Position(BaseModel):
+    model_config = FROZEN
+
     x: float = Field(..., description="X coordinate in meters")
     y: float = Field(..., description="Y coordinate in meters")
 
 
 # 3D dimensions of an object or room
 class Dimensions(BaseModel):
+    model_config = FROZEN
+
     length_m: float = Field(..., description="Length in meters", gt=0, le= TOO_LARGE_DIMENSION)
     width_m: float = Field(..., description="Width in meters", gt=0, le = TOO_LARGE_DIMENSION)
     height_m: float = Field(..., description="Height in meters", gt=0, le = TOO_LARGE_DIMENSION)
@@ -20,6 +27,8 @@ class Dimensions(BaseModel):
 
 # Metadata about the room
 class RoomMetadata(BaseModel):
+    model_config = FROZEN
+
     # Later on we can have defined room_types
     room_type: Optional[Literal[
         "bedroom",
@@ -82,6 +91,8 @@ class RoomDimensions(Dimensions):
 
 # An object in the room
 class Object(BaseModel):
+    model_config = FROZEN
+
     id: str = Field(..., description="Unique identifier for the object")
     type: str = Field(..., description="Type of object (bed, desk, sofa, door, window, plant, etc)")
     position: Position = Field(..., description="2D position of the object")
@@ -98,12 +109,16 @@ class AnalyzeRoomRequest(BaseModel):
 
 # Analysis of a Bagua zone
 class BaguaAnalysis(BaseModel):
+    model_config = FROZEN
+
     zone: str = Field(..., description="Bagua zone name (wealth, health, career, relationships, etc)")
     score: int = Field(..., description="Zone score (0-100)", ge=0, le=100)
     notes: str = Field(..., description="Notes about the zone")
 
 # A Feng Shui suggestion
 class Suggestion(BaseModel):
+    model_config = FROZEN
+
     id: str = Field(..., description="Unique identifier for the suggestion")
     title: str = Field(..., description="Short title of the suggestion")
     description: str = Field(..., description="Detailed description of the suggestion")
@@ -116,6 +131,8 @@ class Suggestion(BaseModel):
 
 # UI hints for frontend visualization
 class UIHints(BaseModel):
+    model_config = FROZEN
+
     highlight_objects: List[str] = Field(
         default_factory=list,
         description="Object IDs that should be highlighted"
@@ -128,7 +145,25 @@ class UIHints(BaseModel):
 
 # Response model for room analysis
 class AnalyzeRoomResponse(BaseModel):
+    model_config = FROZEN
+
     feng_shui_score: int = Field(..., description="Overall Feng Shui score (0-100)", ge=0, le=100)
     bagua_analysis: List[BaguaAnalysis] = Field(..., description="Analysis of each Bagua zone")
     suggestions: List[Suggestion] = Field(..., description="List of Feng Shui suggestions")
     ui_hints: UIHints = Field(..., description="UI hints for frontend")
+    request_id: Optional[str] = Field(
+        default=None,
+        description="Set when AI-enhanced suggestions are being generated; poll /analyze-room/{request_id}/ai-suggestions"
+    )
+
+
+# Response model for polling background AI-enhanced suggestions
+class AISuggestionsResponse(BaseModel):
+    model_config = FROZEN
+
+    request_id: str = Field(..., description="Request id returned by /analyze-room")
+    status: Literal["pending", "ready"] = Field(..., description="Whether the AI suggestions are ready")
+    suggestions: List[Suggestion] = Field(
+        default_factory=list,
+        description="AI-enhanced suggestions (empty while pending)"
+    )
@@ -1,14 +1,132 @@
 import logging
-from fastapi import APIRouter
-from app.models import AnalyzeRoomRequest, AnalyzeRoomResponse, UIHints
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from app.models import AnalyzeRoomRequest, AnalyzeRoomResponse, AISuggestionsResponse, BaguaAnalysis, Suggestion
+from app.fast_models import decode_analyze_request, request_body_schema
 from app.logic.fengshui import FengShuiAnalyzer
-from app.services.ai_service import AISuggestionEnhancer
-from app.config import USE_AI_ENHANCEMENT, AI_API_KEY
+from app.services.ai_service import get_enhancer
+from app.services import ai_results
+from app.config import USE_AI_ENHANCEMENT, ANALYSIS_CACHE_SIZE
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+AnalysisResult = Tuple[int, List[BaguaAnalysis], List[Suggestion], dict]
+
+# Canonical request JSON -> (analyzer, analyze() result), least recently used first.
+# The analysis is deterministic and the rules live in code, so entries never go stale
+_analysis_cache: "OrderedDict[bytes, Tuple[FengShuiAnalyzer, AnalysisResult]]" = OrderedDict()
+
+
+def _request_key(request: AnalyzeRoomRequest) -> bytes:
+    """Canonical JSON of a request - equal for requests that would be analyzed identically"""
+    return orjson.dumps(request.model_dump(), option=orjson.OPT_SORT_KEYS)
+
+
+def _run_analysis(request: AnalyzeRoomRequest) -> Tuple[FengShuiAnalyzer, AnalysisResult]:
+    analyzer = FengShuiAnalyzer(request)
+    return analyzer, analyzer.analyze()
+
+
+async def _analyze_cached(request: AnalyzeRoomRequest, key: Optional[bytes]) -> Tuple[FengShuiAnalyzer, AnalysisResult]:
+    """Run the rule-based analysis, reusing the result for a repeated identical request"""
+    # The analysis is CPU-bound, so it runs in the threadpool to keep the event loop free;
+    # the cache itself is only touched from the event loop
+    if ANALYSIS_CACHE_SIZE <= 0:
+        return await run_in_threadpool(_run_analysis, request)
+    
+    cached = _analysis_cache.get(key)
+    if cached is not None:
+        _analysis_cache.move_to_end(key)
+        return cached
+    
+    cached = await run_in_threadpool(_run_analysis, request)
+    _analysis_cache[key] = cached
+    if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
+    return cached
+
+
+def _response_content(
+    overall_score: int,
+    bagua_analysis: List[BaguaAnalysis],
+    suggestions: List[Suggestion],
+    ui_hints_dict: dict,
+    request_id: Optional[str]
+) -> dict:
+    """AnalyzeRoomResponse as a plain dict, written out field by field"""
+    # Same output as AnalyzeRoomResponse(...).model_dump() at a fraction of the cost;
+    # keep in sync with the AnalyzeRoomResponse, BaguaAnalysis, Suggestion and UIHints fields
+    return {
+        "feng_shui_score": overall_score,
+        "bagua_analysis": [
+            {"zone": zone.zone, "score": zone.score, "notes": zone.notes}
+            for zone in bagua_analysis
+        ],
+        "suggestions": [
+            {
+                "id": suggestion.id,
+                "title": suggestion.title,
+                "description": suggestion.description,
+                "severity": suggestion.severity,
+                "related_object_ids": suggestion.related_object_ids
+            }
+            for suggestion in suggestions
+        ],
+        "ui_hints": {
+            "highlight_objects": ui_hints_dict["highlight_objects"],
+            "recommended_zones": ui_hints_dict["recommended_zones"]
+        },
+        "request_id": request_id
+    }
+
 
+# Body of /analyze-room once the request is decoded
+async def _analyze_room(request: AnalyzeRoomRequest) -> ORJSONResponse:
+    # Run Feng Shui analysis (rule-based); results are shared between identical
+    # requests, so they are only read from here on
+    key = _request_key(request) if ANALYSIS_CACHE_SIZE > 0 or USE_AI_ENHANCEMENT else None
+    analyzer, (overall_score, bagua_analysis, suggestions, ui_hints_dict) = await _analyze_cached(request, key)
+    
+    # AI Enhancement (optional - disabled by default), run in the background
+    request_id = None
+    if USE_AI_ENHANCEMENT:
+        logger.debug("AI enhancement enabled. Enhancing %d suggestions in the background...", len(suggestions))
+        ai_enhancer = get_enhancer()
+        
+        # Check if AI is actually enabled (might be disabled if API key missing)
+        if ai_enhancer.enabled:
+            # Prepare context for AI
+            context = ai_enhancer._prepare_context_for_ai(
+                request=request,
+                zone_scores={zone.zone: zone.score for zone in bagua_analysis},
+                rule_violations=analyzer.rule_violations,
+                rule_compliances=analyzer.rule_compliances,
+                object_ids_by_type=analyzer.object_ids_by_type
+            )
+            
+            # Enhance suggestions with AI without holding up the rule-based response;
+            # identical requests share one AI call
+            request_id = ai_results.start_enhancement(ai_enhancer, suggestions, context, dedupe_key=key)
+        else:
+            logger.warning("AI enhancement requested but not available (missing API key or package)")
+    else:
+        logger.debug("AI enhancement disabled. Using %d rule-based suggestions.", len(suggestions))
+    
+    # Every field comes from the analyzer, so skip re-validation
+    return ORJSONResponse(content=_response_content(
+        overall_score, bagua_analysis, suggestions, ui_hints_dict, request_id
+    ))
+
+
+# The body is decoded from the raw bytes in one pass (see app.fast_models) and the
+# response is returned pre-serialized, so FastAPI neither parses the body nor re-validates
+# the response; the models are still listed for the OpenAPI schema
 """
     Analyze a room and return Feng Shui insights using rule-based logic.
     
@@ -26,41 +144,45 @@ router = APIRouter()
     - birth_year: User's birth year for personalized calculations (optional)
     
     The response prioritizes the feng_shui_intention zone if specified.
-"""
-@router.post("/analyze-room", response_model=AnalyzeRoomResponse)
-async def analyze_room(request: AnalyzeRoomRequest) -> AnalyzeRoomResponse:
-    # Run Feng Shui analysis (rule-based)
-    analyzer = FengShuiAnalyzer(request)
-    overall_score, bagua_analysis, suggestions, ui_hints_dict = analyzer.analyze()
     
-    # AI Enhancement (optional - disabled by default)
-    if USE_AI_ENHANCEMENT:
-        logger.info(f"AI enhancement enabled. Enhancing {len(suggestions)} suggestions...")
-        ai_enhancer = AISuggestionEnhancer(api_key=AI_API_KEY)
-        
-        # Check if AI is actually enabled (might be disabled if API key missing)
-        if ai_enhancer.enabled:
-            # Prepare context for AI
-            context = ai_enhancer._prepare_context_for_ai(
-                request=request,
-                zone_scores={zone.zone: zone.score for zone in bagua_analysis},
-                rule_violations=analyzer.rule_violations,
-                rule_compliances=analyzer.rule_compliances
-            )
-            
-            # Enhance suggestions with AI
-            suggestions = await ai_enhancer.enhance_suggestions(suggestions, context)
-        else:
-            logger.warning("AI enhancement requested but not available (missing API key or package)")
-    else:
-        logger.debug(f"AI enhancement disabled. Using {len(suggestions)} rule-based suggestions.")
+    With AI enhancement enabled, the rule-based result is returned immediately with a
+    request_id; the AI-enhanced suggestions are fetched from
+    /analyze-room/{request_id}/ai-suggestions once ready.
+"""
+@router.post(
+    "/analyze-room",
+    responses={200: {"model": AnalyzeRoomResponse}},
+    openapi_extra={"requestBody": {
+        "content": {"application/json": {"schema": request_body_schema()}},
+        "required": True
+    }}
+)
+async def analyze_room(raw_request: Request) -> ORJSONResponse:
+    return await _analyze_room(decode_analyze_request(await raw_request.body()))
+
+
+# Poll for the AI-enhanced suggestions started by /analyze-room
+# With wait > 0 the request is held until the suggestions are ready (or wait runs out),
+# so one long-poll replaces repeated polling
+# Suggestions are already validated models, so the response is returned pre-serialized
+@router.get("/analyze-room/{request_id}/ai-suggestions", responses={200: {"model": AISuggestionsResponse}})
+async def get_ai_suggestions(
+    request_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for the suggestions to be ready")
+) -> ORJSONResponse:
+    found, suggestions = await ai_results.wait_for_result(request_id, wait)
+    if not found:
+        raise HTTPException(status_code=404, detail="Unknown or expired request_id")
     
-    return AnalyzeRoomResponse(
-        feng_shui_score=overall_score,
-        bagua_analysis=bagua_analysis,
-        suggestions=suggestions,
-        ui_hints=UIHints(
-            highlight_objects=ui_hints_dict["highlight_objects"],
-            recommended_zones=ui_hints_dict["recommended_zones"]
-        )
+    response = AISuggestionsResponse.model_construct(
+        request_id=request_id,
+        status="pending" if suggestions is None else "ready",
+        suggestions=suggestions or []
     )
+    return ORJSONResponse(content=response.model_dump())
+
+
+# AI response cache counters (null when AI enhancement is off)
+@router.get("/metrics")
+async def metrics() -> dict:
+    return {"ai_cache": get_enhancer().cache.stats if USE_AI_ENHANCEMENT else None}
@@ -1,6 +1,6 @@
 """
 Services module for AI and external integrations
 """
-from app.services.ai_service import AISuggestionEnhancer
+from app.services.ai_service import AISuggestionEnhancer, get_enhancer
 
-__all__ = ["AISuggestionEnhancer"]
+__all__ = ["AISuggestionEnhancer", "get_enhancer"]
@@ -0,0 +1,154 @@
+"""
+Response cache for AI suggestion enhancement
+Identical prompts (same model, room context and rule-based suggestions) skip the Gemini call
+"""
+import hashlib
+import logging
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(Protocol):
+    """Storage used by the AI response cache - swap in e.g. a Redis-backed one for multiple workers"""
+
+    def get(self, key: str) -> Optional[Any]: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expiry time, value), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class SQLiteCache(MemoryCache):
+    """
+    MemoryCache that writes entries through to a SQLite file and reloads the
+    unexpired ones on start-up, so a restart or redeploy keeps a warm cache.
+    
+    Lookups are served from memory. Writes go to the file from a single background
+    thread, so a slow disk never blocks the event loop. Values are pickled, so point
+    this at a file only the app writes.
+    """
+
+    def __init__(self, path: str, max_entries: int = 256, ttl: float = 3600):
+        super().__init__(max_entries, ttl)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ai_cache_expires_at ON ai_cache (expires_at)")
+        self._rows = 0  # Rows in the file; only touched by the writer thread after _load
+        self._load()
+        # One worker keeps the writes in order and the connection on a single thread
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-cache-writer")
+
+    def _load(self) -> None:
+        # Expiry is stored as wall-clock time, which survives a restart, and
+        # converted back to the monotonic clock MemoryCache uses
+        now, monotonic_now = time.time(), time.monotonic()
+        with self._db:
+            self._db.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (now,))
+            rows = self._db.execute(
+                "SELECT key, value, expires_at FROM ai_cache ORDER BY expires_at DESC"
+            ).fetchall()
+            self._rows = len(rows)
+            self._trim()
+        for key, value, expires_at in reversed(rows[:self.max_entries]):
+            try:
+                self._entries[key] = (monotonic_now + expires_at - now, pickle.loads(value))
+            except Exception as e:
+                # e.g. written by an older version of the models - drop it
+                logger.debug("Skipping unreadable AI cache entry: %s", e)
+        logger.info("Loaded %d AI cache entries from disk", len(self._entries))
+
+    def _trim(self) -> None:
+        """Drop the oldest rows once the file holds more than max_entries"""
+        excess = self._rows - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM ai_cache WHERE key IN (SELECT key FROM ai_cache ORDER BY expires_at LIMIT ?)",
+                (excess,)
+            )
+            self._rows -= excess
+
+    def _write(self, key: str, value: Any, expires_at: float) -> None:
+        try:
+            with self._db:
+                exists = self._db.execute("SELECT 1 FROM ai_cache WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ai_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, pickle.dumps(value), expires_at)
+                )
+                if exists is None:
+                    self._rows += 1
+                    self._trim()
+        except Exception as e:
+            # The in-memory entry is already set; losing the disk copy only costs a warm start
+            logger.warning("Failed to persist AI cache entry: %s", e)
+
+    def _remove(self, key: str) -> None:
+        try:
+            with self._db:
+                self._rows -= self._db.execute("DELETE FROM ai_cache WHERE key = ?", (key,)).rowcount
+        except Exception as e:
+            logger.warning("Failed to delete AI cache entry: %s", e)
+
+    def set(self, key: str, value: Any) -> None:
+        super().set(key, value)
+        self._writer.submit(self._write, key, value, time.time() + self.ttl)
+
+    def delete(self, key: str) -> None:
+        super().delete(key)
+        self._writer.submit(self._remove, key)
+
+
+class LLMCache:
+    """Caches parsed AI responses by a digest of the model name and prompt, counting hits/misses"""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.backend.get(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.backend.set(key, value)
@@ -0,0 +1,127 @@
+"""
+In-process store for AI-enhanced suggestions produced after the response is sent
+Lets /analyze-room return the rule-based result immediately while the AI call runs
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.config import AI_RESULT_TTL, AI_RESULT_MAX_ENTRIES
+from app.models import Suggestion
+from app.services.ai_service import AISuggestionEnhancer
+
+# request_id -> (expiry time, enhanced suggestions or None while the AI call is running,
+# dedupe key or None)
+_results: "OrderedDict[str, Tuple[float, Optional[List[Suggestion]], Optional[bytes]]]" = OrderedDict()
+
+# Dedupe key -> request_id of the AI call currently running for it, so identical requests
+# share one in-flight AI call instead of each starting their own. Once the call finishes
+# the key is dropped: a repeat then starts a new call, which the AI response cache answers
+# unless the last attempt fell back to the rule-based suggestions
+_request_ids_by_key: Dict[bytes, str] = {}
+
+# request_id -> running task; also keeps a strong reference so tasks aren't garbage
+# collected mid-flight
+_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _evict_expired(now: float):
+    """Drop expired entries (oldest first) and cap the store size"""
+    # Entries whose AI call is still running are kept, even past the cap: their
+    # request_id has just been handed to a client that is about to poll for it
+    excess = len(_results) - AI_RESULT_MAX_ENTRIES
+    evicted = []
+    for request_id, (expires_at, _, dedupe_key) in _results.items():
+        if expires_at > now and excess <= 0:
+            break
+        if request_id in _tasks:
+            continue
+        evicted.append((request_id, dedupe_key))
+        excess -= 1
+    
+    for request_id, dedupe_key in evicted:
+        del _results[request_id]
+        if dedupe_key is not None and _request_ids_by_key.get(dedupe_key) == request_id:
+            del _request_ids_by_key[dedupe_key]
+
+
+"""
+    Start enhancing suggestions in the background.
+
+    Args:
+        enhancer: Enabled AI enhancer
+        suggestions: Rule-based suggestions already returned to the client
+        context: Context dictionary for the AI prompt
+        dedupe_key: Identifies identical requests; if one is still being enhanced,
+            its request_id is returned and no new AI call is made
+
+    Returns:
+        request_id to poll for the enhanced suggestions
+"""
+def start_enhancement(
+    enhancer: AISuggestionEnhancer,
+    suggestions: List[Suggestion],
+    context: Dict,
+    dedupe_key: Optional[bytes] = None
+) -> str:
+    now = time.monotonic()
+    _evict_expired(now)
+
+    if dedupe_key is not None:
+        request_id = _request_ids_by_key.get(dedupe_key)
+        if request_id is not None:
+            return request_id
+
+    request_id = uuid.uuid4().hex
+    _results[request_id] = (now + AI_RESULT_TTL, None, dedupe_key)
+    if dedupe_key is not None:
+        _request_ids_by_key[dedupe_key] = request_id
+
+    async def run():
+        # enhance_suggestions already falls back to the rule-based suggestions on error
+        enhanced = await enhancer.enhance_suggestions(suggestions, context)
+        entry = _results.get(request_id)
+        if entry is not None:
+            # Keep the original expiry so insertion order stays expiry order
+            _results[request_id] = (entry[0], enhanced, entry[2])
+
+    task = asyncio.create_task(run())
+    _tasks[request_id] = task
+    task.add_done_callback(lambda _: _finish(request_id, dedupe_key))
+    return request_id
+
+
+def _finish(request_id: str, dedupe_key: Optional[bytes]):
+    """Forget a finished AI call's task and stop coalescing new requests onto it"""
+    _tasks.pop(request_id, None)
+    if dedupe_key is not None and _request_ids_by_key.get(dedupe_key) == request_id:
+        del _request_ids_by_key[dedupe_key]
+
+
+"""
+    Look up the AI result for a request.
+
+    Returns:
+        (found, suggestions) - suggestions is None while the AI call is still running
+"""
+def get_result(request_id: str) -> Tuple[bool, Optional[List[Suggestion]]]:
+    _evict_expired(time.monotonic())
+    entry = _results.get(request_id)
+    if entry is None:
+        return False, None
+    return True, entry[1]
+
+
+"""
+    Like get_result, but waits up to timeout seconds for a running AI call to finish.
+
+    Lets clients long-poll instead of polling repeatedly while the AI call runs.
+"""
+async def wait_for_result(request_id: str, timeout: float) -> Tuple[bool, Optional[List[Suggestion]]]:
+    task = _tasks.get(request_id)
+    if task is not None and timeout > 0:
+        # asyncio.wait doesn't cancel the task on timeout
+        await asyncio.wait({task}, timeout=timeout)
+    return get_result(request_id)
@@ -3,22 +3,100 @@ AI Service for enhancing Feng Shui suggestions with personalized context
 Designed with fallback mechanism - works without AI if unavailable
 """
 import os
-import json
+import time
+import random
+import orjson
 import logging
 import asyncio
+import functools
+import importlib.util
 from typing import List, Dict, Optional
 from app.models import AnalyzeRoomRequest, Suggestion
+from app.services.ai_cache import LLMCache, MemoryCache, SQLiteCache
 
 logger = logging.getLogger(__name__)
 
-# Try to import Gemini - fallback if not installed
+# Check for Gemini without importing it - the SDK (gRPC, protobuf, auth) is only
+# imported once an enhancer with an API key is created
 try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
+    GEMINI_AVAILABLE = importlib.util.find_spec("google.generativeai") is not None
+except ModuleNotFoundError:
     GEMINI_AVAILABLE = False
+if not GEMINI_AVAILABLE:
     logger.warning("google-generativeai not installed. AI enhancement will be disabled.")
 
+# Circuit breaker: after this many failed Gemini calls within the window, skip the API
+# for the cool-down period instead of piling requests onto a broken upstream
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_FAILURE_WINDOW = 60  # seconds
+CIRCUIT_COOLDOWN = 30  # seconds
+
+# Transient Gemini failures (timeouts, rate limits, unavailable) are retried with
+# exponential backoff plus jitter before they count towards the circuit breaker
+RETRY_ATTEMPTS = 3
+RETRY_MAX_DELAY = 4  # seconds
+
+# Structured output: Gemini returns bare JSON matching the Suggestion fields
+SUGGESTIONS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            "title": {"type": "string"},
+            "description": {"type": "string"},
+            "severity": {"type": "string"},
+            "related_object_ids": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["id", "title", "description", "severity", "related_object_ids"]
+    }
+}
+GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": SUGGESTIONS_SCHEMA}
+
+# Allowed Suggestion.severity values
+SEVERITIES = frozenset(("low", "medium", "high"))
+
+# Instructions shared by every enhancement request; sent as the model's system
+# instruction so each request's prompt only carries the room it is about
+SYSTEM_INSTRUCTION = """You are an expert Feng Shui consultant. Enhance the Feng Shui suggestions you are given with personalized, actionable advice.
+
+TASK:
+Enhance each suggestion's description with personalized, actionable advice based on:
+1. Room style - incorporate style-specific recommendations
+2. Feng Shui intention - relate to their goal
+3. Birth year - if provided, add relevant Chinese astrology insights
+4. Make descriptions more engaging and actionable
+5. Keep the same suggestion IDs, titles, and severity levels
+
+IMPORTANT:
+- Return ONLY valid JSON array format
+- Keep all suggestion IDs exactly the same
+- Keep all titles (you can refine them slightly)
+- Keep all severity levels (low, medium, high)
+- Enhance descriptions with personalized, actionable advice
+- Keep related_object_ids the same
+
+FORMAT: JSON array of suggestions
+[
+  {
+    "id": "suggestion_id",
+    "title": "Enhanced title (optional refinement)",
+    "description": "Enhanced description with personalization",
+    "severity": "low|medium|high",
+    "related_object_ids": ["object_id1", "object_id2"]
+  },
+  ...
+]"""
+
+# Per-request prompt, filled in with the room being analyzed
+PROMPT_TEMPLATE = """ROOM CONTEXT:
+{room_context}
+
+CURRENT SUGGESTIONS:
+{suggestions_text}
+
+Return the enhanced suggestions as JSON:"""
+
 
 """
     Enhances rule-based Feng Shui suggestions with AI-generated personalized content.
@@ -39,6 +117,28 @@ class AISuggestionEnhancer:
         self.timeout = int(os.getenv("AI_TIMEOUT", "5"))
         self.gemini_model = None
         
+        # Circuit breaker state (see CIRCUIT_*)
+        self._failures = 0
+        self._first_failure_at = 0.0
+        self._circuit_open_until = 0.0
+        
+        # Errors worth retrying; the SDK's rate-limit/unavailable errors are added once it's imported
+        self._retryable_errors = (asyncio.TimeoutError,)
+        
+        # Caps concurrent Gemini calls so bursts don't exhaust the API rate limit
+        self._concurrency = asyncio.Semaphore(int(os.getenv("AI_CONCURRENCY", "8")))
+        
+        # Enhanced suggestions for prompts already sent (users iterate on the same layout);
+        # with AI_CACHE_PATH set they are also kept in a SQLite file across restarts
+        cache_size = int(os.getenv("AI_CACHE_SIZE", "256"))
+        cache_ttl = int(os.getenv("AI_CACHE_TTL", "3600"))
+        cache_path = os.getenv("AI_CACHE_PATH")
+        if cache_path:
+            backend = SQLiteCache(cache_path, max_entries=cache_size, ttl=cache_ttl)
+        else:
+            backend = MemoryCache(max_entries=cache_size, ttl=cache_ttl)
+        self.cache = LLMCache(backend)
+        
         if not GEMINI_AVAILABLE:
             logger.warning("google-generativeai package not installed. Install with: pip install google-generativeai")
             self.enabled = False
@@ -47,11 +147,22 @@ class AISuggestionEnhancer:
         else:
             # Configure Gemini
             try:
+                import google.generativeai as genai
+                from google.api_core import exceptions as api_exceptions
+                self._retryable_errors = (
+                    asyncio.TimeoutError,
+                    api_exceptions.ResourceExhausted,
+                    api_exceptions.ServiceUnavailable
+                )
                 genai.configure(api_key=self.api_key)
-                self.gemini_model = genai.GenerativeModel(self.model_name)
-                logger.info(f"Gemini AI enabled with model: {self.model_name}")
+                self.gemini_model = genai.GenerativeModel(
+                    self.model_name,
+                    generation_config=GENERATION_CONFIG,
+                    system_instruction=SYSTEM_INSTRUCTION
+                )
+                logger.info("Gemini AI enabled with model: %s", self.model_name)
             except Exception as e:
-                logger.warning(f"Failed to configure Gemini: {e}. AI enhancement disabled.")
+                logger.warning("Failed to configure Gemini: %s. AI enhancement disabled.", e)
                 self.enabled = False
     
 
@@ -77,8 +188,13 @@ class AISuggestionEnhancer:
         if not self.enabled:
             return rule_suggestions
         
+        # Nothing to enhance (the room follows every rule) - don't spend a Gemini call on it
+        if not rule_suggestions:
+            logger.debug("No rule-based suggestions, skipping AI enhancement")
+            return rule_suggestions
+        
         try:
-            logger.debug(f"AI enhancement called for {len(rule_suggestions)} suggestions")
+            logger.debug("AI enhancement called for %d suggestions", len(rule_suggestions))
             
             # Call Gemini API to enhance suggestions
             enhanced = await self._call_ai_api(rule_suggestions, context)
@@ -86,9 +202,31 @@ class AISuggestionEnhancer:
             
         except Exception as e:
             # Always fallback to rule-based on error
-            logger.warning(f"AI enhancement failed, using fallback: {e}")
+            logger.warning("AI enhancement failed, using fallback: %s", e)
             return rule_suggestions
     
+    def _record_success(self):
+        """Close the circuit after a successful Gemini call"""
+        if self._failures:
+            logger.info("Gemini call succeeded, resetting circuit breaker")
+        self._failures = 0
+        self._circuit_open_until = 0.0
+    
+    def _record_failure(self):
+        """Count a failed Gemini call and open the circuit once failures pile up"""
+        now = time.monotonic()
+        if not self._failures or now - self._first_failure_at > CIRCUIT_FAILURE_WINDOW:
+            self._failures = 0
+            self._first_failure_at = now
+        self._failures += 1
+        
+        if self._failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self._circuit_open_until = now + CIRCUIT_COOLDOWN
+            self._failures = 0
+            logger.warning(
+                "Gemini failed %d times within %ds; skipping AI enhancement for %ds",
+                CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_FAILURE_WINDOW, CIRCUIT_COOLDOWN
+            )
 
     """
         Prepare context data structure for AI enhancement.
@@ -98,6 +236,8 @@ class AISuggestionEnhancer:
             zone_scores: Calculated zone scores
             rule_violations: List of rule violations detected
             rule_compliances: List of good placements detected
+            object_ids_by_type: Lowercased object type -> ids, if already computed
+                (FengShuiAnalyzer.object_ids_by_type); built from the request otherwise
         
         Returns:
             Structured context dictionary for AI
@@ -107,9 +247,15 @@ class AISuggestionEnhancer:
         request: AnalyzeRoomRequest,
         zone_scores: Dict[str, int],
         rule_violations: List[str],
-        rule_compliances: List[str]
+        rule_compliances: List[str],
+        object_ids_by_type: Optional[Dict[str, List[str]]] = None
     ) -> Dict:
 
+        if object_ids_by_type is None:
+            object_ids_by_type = {}
+            for obj in request.objects:
+                object_ids_by_type.setdefault(obj.type.lower(), []).append(obj.id)
+
         return {
             "room_metadata": {
                 "room_type": request.room_metadata.room_type,
@@ -124,13 +270,13 @@ class AISuggestionEnhancer:
                 "height_m": request.room_dimensions.height_m
             },
             "object_count": len(request.objects),
-            "object_types": list(set(obj.type.lower() for obj in request.objects)),
+            "object_types": list(object_ids_by_type),
             "zone_scores": zone_scores,
             "rule_violations": rule_violations,
             "rule_compliances": rule_compliances,
             "summary": {
-                "has_windows": any(obj.type.lower() == "window" for obj in request.objects),
-                "has_plants": any(obj.type.lower() == "plant" for obj in request.objects),
+                "has_windows": "window" in object_ids_by_type,
+                "has_plants": "plant" in object_ids_by_type,
                 "total_suggestions": len(rule_violations) + len(rule_compliances)
             }
         }
@@ -158,23 +304,69 @@ class AISuggestionEnhancer:
             # Build prompt for Gemini
             prompt = self._build_enhancement_prompt(suggestions, context)
             
-            # Call Gemini API (sync call in async context)
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.gemini_model.generate_content(prompt)
-            )
+            # Same prompt as an earlier call -> same enhancement, skip the API
+            cache_key = self.cache.make_key(self.model_name, prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Using cached Gemini enhancement for %d suggestions", len(cached))
+                return list(cached)
+            
+            # Gemini has been failing - fall back right away until the cool-down ends
+            # (cached enhancements above don't need Gemini, so they're still served)
+            if self._circuit_open_until > time.monotonic():
+                logger.debug("Gemini circuit open, using rule-based suggestions")
+                return suggestions
+            
+            # Call Gemini API with the SDK's native async client (no executor thread)
+            response = await self._generate_with_retry(prompt)
+            self._record_success()
             
             # Parse response and enhance suggestions
             enhanced_suggestions = self._parse_ai_response(response.text, suggestions)
             
-            logger.info(f"Successfully enhanced {len(enhanced_suggestions)} suggestions with Gemini")
+            # Only cache real enhancements, not the fallback to the originals
+            if enhanced_suggestions is not suggestions:
+                self.cache.set(cache_key, tuple(enhanced_suggestions))
+            
+            logger.info("Successfully enhanced %d suggestions with Gemini", len(enhanced_suggestions))
             return enhanced_suggestions
             
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Gemini API call timed out after %ds (%d attempts). Using original suggestions.",
+                self.timeout, RETRY_ATTEMPTS
+            )
+            self._record_failure()
+            return suggestions
         except Exception as e:
-            logger.warning(f"Gemini API call failed: {e}. Using original suggestions.")
+            logger.warning("Gemini API call failed: %s. Using original suggestions.", e)
+            self._record_failure()
             return suggestions
     
+    async def _generate_with_retry(self, prompt: str):
+        """
+        Call Gemini, retrying transient failures with exponential backoff.
+        
+        Each attempt gives up after AI_TIMEOUT seconds so a hung call can't hold the
+        task forever. The last attempt's error is raised to the caller.
+        """
+        for attempt in range(1, RETRY_ATTEMPTS + 1):
+            try:
+                async with self._concurrency:
+                    return await asyncio.wait_for(
+                        self.gemini_model.generate_content_async(prompt),
+                        timeout=self.timeout
+                    )
+            except self._retryable_errors as e:
+                if attempt == RETRY_ATTEMPTS:
+                    raise
+                delay = min(2 ** (attempt - 1) + random.random(), RETRY_MAX_DELAY)
+                logger.info(
+                    "Gemini call attempt %d/%d failed (%s), retrying in %.1fs",
+                    attempt, RETRY_ATTEMPTS, type(e).__name__, delay
+                )
+                await asyncio.sleep(delay)
+    
     def _build_enhancement_prompt(
         self,
         suggestions: List[Suggestion],
@@ -191,10 +383,26 @@ class AISuggestionEnhancer:
             Formatted prompt string for Gemini
         """
         metadata = context.get("room_metadata", {})
-        room_type = metadata.get("room_type", "room")
-        room_style = metadata.get("room_style", "")
-        intention = metadata.get("feng_shui_intention", "")
-        birth_year = metadata.get("birth_year")
+        
+        # Only what's known about the room - unspecified fields and empty lists are left
+        # out rather than spelled out, and values are compact JSON, to keep the prompt short
+        room_context = [f"- Room Type: {metadata.get('room_type') or 'room'}"]
+        for label, key in (
+            ("Style", "room_style"),
+            ("Feng Shui Intention", "feng_shui_intention"),
+            ("Birth Year", "birth_year")
+        ):
+            value = metadata.get(key)
+            if value:
+                room_context.append(f"- {label}: {value}")
+        for label, key in (
+            ("Zone Scores", "zone_scores"),
+            ("Rule Violations", "rule_violations"),
+            ("Rule Compliances", "rule_compliances")
+        ):
+            value = context.get(key)
+            if value:
+                room_context.append(f"- {label}: {orjson.dumps(value).decode()}")
         
         # Format suggestions for prompt
         suggestions_text = "\n".join([
@@ -202,49 +410,10 @@ class AISuggestionEnhancer:
             for s in suggestions
         ])
         
-        prompt = f"""You are an expert Feng Shui consultant. Enhance these Feng Shui suggestions with personalized, actionable advice.
-
-ROOM CONTEXT:
-- Room Type: {room_type}
-- Style: {room_style if room_style else 'Not specified'}
-- Feng Shui Intention: {intention if intention else 'Not specified'}
-- Birth Year: {birth_year if birth_year else 'Not specified'}
-- Zone Scores: {context.get('zone_scores', {})}
-- Rule Violations: {context.get('rule_violations', [])}
-- Rule Compliances: {context.get('rule_compliances', [])}
-
-CURRENT SUGGESTIONS:
-{suggestions_text}
-
-TASK:
-Enhance each suggestion's description with personalized, actionable advice based on:
-1. Room style ({room_style}) - incorporate style-specific recommendations
-2. Feng Shui intention ({intention}) - relate to their goal
-3. Birth year ({birth_year}) - if provided, add relevant Chinese astrology insights
-4. Make descriptions more engaging and actionable
-5. Keep the same suggestion IDs, titles, and severity levels
-
-IMPORTANT:
-- Return ONLY valid JSON array format
-- Keep all suggestion IDs exactly the same
-- Keep all titles (you can refine them slightly)
-- Keep all severity levels (low, medium, high)
-- Enhance descriptions with personalized, actionable advice
-- Keep related_object_ids the same
-
-FORMAT: JSON array of suggestions
-[
-  {{
-    "id": "suggestion_id",
-    "title": "Enhanced title (optional refinement)",
-    "description": "Enhanced description with personalization",
-    "severity": "low|medium|high",
-    "related_object_ids": ["object_id1", "object_id2"]
-  }},
-  ...
-]
-
-Return the enhanced suggestions as JSON:"""
+        prompt = PROMPT_TEMPLATE.format(
+            room_context="\n".join(room_context),
+            suggestions_text=suggestions_text
+        )
         
         return prompt
     
@@ -264,20 +433,15 @@ Return the enhanced suggestions as JSON:"""
             List of enhanced suggestions
         """
         try:
-            # Try to extract JSON from response (Gemini may wrap in markdown)
-            response_text = response_text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            # Parse JSON
-            enhanced_data = json.loads(response_text)
+            # JSON mode returns bare JSON; if something else slipped through (a code fence in
+            # any case, prose before or after), fall back to the outermost [...] in the text
+            try:
+                enhanced_data = orjson.loads(response_text)
+            except orjson.JSONDecodeError:
+                start, end = response_text.find("["), response_text.rfind("]")
+                if start < 0 or end < start:
+                    raise
+                enhanced_data = orjson.loads(response_text[start:end + 1])
             
             if not isinstance(enhanced_data, list):
                 raise ValueError("Expected JSON array")
@@ -285,28 +449,38 @@ Return the enhanced suggestions as JSON:"""
             # Create enhanced suggestions
             enhanced_suggestions = []
             
-            # Create lookup map of original suggestions by ID
-            original_map = {s.id: s for s in original_suggestions}
+            # Originals by ID not yet matched to an enhanced suggestion
+            remaining = {s.id: s for s in original_suggestions}
             
             for item in enhanced_data:
                 suggestion_id = item.get("id")
                 
                 # Use original suggestion as base (ensures all fields present)
-                if suggestion_id in original_map:
-                    original = original_map[suggestion_id]
+                original = remaining.pop(suggestion_id, None)
+                if original is not None:
+                    title = item.get("title")
+                    description = item.get("description")
+                    severity = item.get("severity")
+                    related_object_ids = item.get("related_object_ids")
                     
-                    # Create enhanced version with updated description
-                    enhanced = Suggestion(
+                    # Create enhanced version with updated description, checking each field
+                    # here (keeping the original's where the model's is unusable) instead of
+                    # running full pydantic validation
+                    enhanced = Suggestion.model_construct(
                         id=suggestion_id,
-                        title=item.get("title", original.title),
-                        description=item.get("description", original.description),
-                        severity=item.get("severity", original.severity),
-                        related_object_ids=item.get("related_object_ids", original.related_object_ids)
+                        title=title if isinstance(title, str) else original.title,
+                        description=description if isinstance(description, str) else original.description,
+                        severity=severity if isinstance(severity, str) and severity in SEVERITIES else original.severity,
+                        related_object_ids=(
+                            related_object_ids
+                            if isinstance(related_object_ids, list) and all(isinstance(i, str) for i in related_object_ids)
+                            else original.related_object_ids
+                        )
                     )
                     enhanced_suggestions.append(enhanced)
                 else:
-                    # If ID not found, try to create from item (shouldn't happen)
-                    logger.warning(f"Suggestion ID {suggestion_id} not found in originals")
+                    # Unknown or repeated ID (shouldn't happen)
+                    logger.warning("Suggestion ID %s not found in originals", suggestion_id)
             
             # If parsing failed or no enhanced suggestions, return original
             if not enhanced_suggestions:
@@ -314,17 +488,21 @@ Return the enhanced suggestions as JSON:"""
                 return original_suggestions
             
             # Ensure all original suggestions are included (in case AI missed some)
-            enhanced_ids = {s.id for s in enhanced_suggestions}
-            for orig in original_suggestions:
-                if orig.id not in enhanced_ids:
-                    enhanced_suggestions.append(orig)
+            enhanced_suggestions.extend(remaining.values())
             
             return enhanced_suggestions
             
-        except json.JSONDecodeError as e:
-            logger.warning(f"Failed to parse Gemini JSON response: {e}")
-            logger.debug(f"Response text: {response_text[:200]}")
+        except orjson.JSONDecodeError as e:
+            logger.warning("Failed to parse Gemini JSON response: %s", e)
+            logger.debug("Response text: %.200s", response_text)
             return original_suggestions
         except Exception as e:
-            logger.warning(f"Error parsing AI response: {e}")
+            logger.warning("Error parsing AI response: %s", e)
             return original_suggestions
+
+
+# One enhancer per process, created on first use: the Gemini client, response cache,
+# concurrency limit and circuit breaker are shared by every request
+@functools.lru_cache(maxsize=1)
+def get_enhancer() -> AISuggestionEnhancer:
+    return AISuggestionEnhancer()
@@ -0,0 +1,60 @@
+"""
+Regression tests for zone scoring on extreme but valid rooms
+Run from FengShui/backend with: python -m pytest tests
+"""
+from fastapi.testclient import TestClient
+
+from app.logic.fengshui import FengShuiAnalyzer
+from app.main import app
+from app.models import AnalyzeRoomRequest
+
+CLUTTER_ZONES = ("wealth", "health", "love", "career", "balance")
+
+
+def _object(object_id, object_type, x, y, rotation_deg=0, length_m=0.5, width_m=0.5):
+    return {
+        "id": object_id,
+        "type": object_type,
+        "position": {"x": x, "y": y},
+        "rotation_deg": rotation_deg,
+        "dimensions": {"length_m": length_m, "width_m": width_m, "height_m": 1.0}
+    }
+
+
+def _cluttered_room(room_size_m):
+    # One 10x10 m sofa in a tiny room - a coverage ratio in the thousands or more
+    return {
+        "room_metadata": {"room_type": "bedroom"},
+        "room_dimensions": {"length_m": room_size_m, "width_m": room_size_m, "height_m": 2.5},
+        "objects": [_object("sofa_1", "sofa", room_size_m / 2, room_size_m / 2, length_m=10, width_m=10)]
+    }
+
+
+def _zone_scores(payload):
+    analyzer = FengShuiAnalyzer(AnalyzeRoomRequest.model_validate(payload))
+    analyzer.analyze()
+    return analyzer.zone_scores
+
+
+def test_many_desks_facing_wall_bottom_out_career():
+    # 1,200 x -30 career must clip to 0, not wrap around to a high score
+    desks = [_object(f"desk_{i}", "desk", 5, 5) for i in range(1200)]
+    scores = _zone_scores({
+        "room_metadata": {"room_type": "office"},
+        "room_dimensions": {"length_m": 10, "width_m": 10, "height_m": 3},
+        "objects": [_object("door_1", "door", 0, 5, rotation_deg=90)] + desks
+    })
+    assert scores["career"] == 0
+    assert scores["wealth"] == 0
+
+
+def test_huge_clutter_ratio_clips_zones_to_zero():
+    for room_size_m in (0.1, 1e-100):
+        scores = _zone_scores(_cluttered_room(room_size_m))
+        assert all(scores[zone] == 0 for zone in CLUTTER_ZONES)
+
+
+def test_huge_clutter_ratio_is_not_a_server_error():
+    response = TestClient(app).post("/analyze-room", json=_cluttered_room(0.1))
+    assert response.status_code == 200
+    assert response.json()["feng_shui_score"] >= 0